@@ -3,9 +3,7 @@ import numpy as np
 import pandas as pd
 from PIL import Image
 import cv2
-from sklearn.cluster import KMeans
-from collections import Counter
-import hashlib
+import io
 
 # --- Konfigurasi halaman ---
 st.set_page_config(
@@ -32,6 +30,10 @@ st.markdown("""
         margin-bottom: 10px;
         box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
     }
+    .color-grid {
+        display: grid;
+        gap: 1rem;
+    }
     .color-info {
         text-align: center;
         font-size: 14px;
@@ -49,66 +51,135 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # --- Fungsi Utility ---
-def get_image_hash(image):
-    """Generate hash untuk mendeteksi perubahan gambar"""
-    return hashlib.md5(np.array(image).tobytes()).hexdigest()
+# Batas jumlah pixel yang dianalisis pada Kualitas Analisis maksimum,
+# berapapun ukuran gambar aslinya
+MAX_ANALYSIS_PIXELS = 256 * 256
 
-def extract_colors_kmeans(image, n_colors=5, resize_factor=0.25):
-    """Extract dominant colors menggunakan KMeans"""
-    img_array = np.array(image)
+def resize_for_analysis(img_array, resize_factor):
+    """Perkecil gambar sesuai resize_factor, dibatasi MAX_ANALYSIS_PIXELS * resize_factor"""
     h, w = img_array.shape[:2]
-    resized = cv2.resize(img_array, (int(w * resize_factor), int(h * resize_factor)))
-    reshaped = resized.reshape(-1, 3)
-
-    kmeans = KMeans(n_clusters=n_colors, random_state=42, n_init=10)
-    kmeans.fit(reshaped)
-
-    centers = kmeans.cluster_centers_.astype(int)
-    labels = kmeans.labels_
-    counts = Counter(labels)
-    total = len(labels)
-
-    color_info = []
-    for i, color in enumerate(centers):
-        pct = (counts[i] / total) * 100
-        hex_code = '#{:02x}{:02x}{:02x}'.format(*color)
-        color_info.append({
-            'color': color,
-            'hex': hex_code,
-            'percentage': pct,
-            'rgb': f"RGB({color[0]}, {color[1]}, {color[2]})"
-        })
-
-    return sorted(color_info, key=lambda x: x['percentage'], reverse=True)
+    scale = min(resize_factor, (MAX_ANALYSIS_PIXELS * resize_factor / (h * w)) ** 0.5)
+    size = (max(1, int(w * scale)), max(1, int(h * scale)))
+    return cv2.resize(img_array, size, interpolation=cv2.INTER_AREA)
+
+def build_color_info(centers, counts):
+    """Susun info warna dari pusat cluster dan jumlah pixel, urut dari yang terbanyak"""
+    pcts = counts * (100.0 / counts.sum())
+    order = np.argsort(-counts, kind='stable')
+
+    return [
+        {
+            'color': centers[i],
+            'hex': '#{:02x}{:02x}{:02x}'.format(*centers[i]),
+            'percentage': pcts[i],
+            'rgb': f"RGB({centers[i][0]}, {centers[i][1]}, {centers[i][2]})"
+        }
+        for i in order
+    ]
+
+def extract_colors_kmeans(img_array, n_colors=5, resize_factor=0.25):
+    """Extract dominant colors menggunakan KMeans"""
+    resized = resize_for_analysis(img_array, resize_factor)
+    reshaped = resized.reshape(-1, 3).astype(np.float32)
+
+    cv2.setRNGSeed(42)
+    criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 20, 1.0)
+    _, labels, centers = cv2.kmeans(reshaped, n_colors, None, criteria, 3, cv2.KMEANS_PP_CENTERS)
+
+    counts = np.bincount(labels.ravel(), minlength=n_colors)
+    return build_color_info(centers.astype(int), counts)
+
+def extract_colors_histogram(img_array, n_colors=5, resize_factor=0.25):
+    """Extract dominant colors dengan kuantisasi histogram 5 bit per channel"""
+    pixels = resize_for_analysis(img_array, resize_factor).reshape(-1, 3)
+    q = (pixels >> 3).astype(np.int32)
+    packed = (q[:, 0] << 10) | (q[:, 1] << 5) | q[:, 2]
+
+    # Rata-rata warna asli di setiap bin
+    hist = np.bincount(packed, minlength=32768)
+    occupied = np.flatnonzero(hist)
+    sums = np.stack([np.bincount(packed, weights=pixels[:, c], minlength=32768) for c in range(3)], axis=1)
+    bin_means = sums[occupied] / hist[occupied, None]
+
+    # Bin terpadat menjadi pusat warna, bin lain digabung ke pusat terdekat
+    n = min(n_colors, occupied.size)
+    top = np.argpartition(-hist[occupied], n - 1)[:n]
+    centers = bin_means[top]
+    dist = ((bin_means[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+    counts = np.bincount(dist.argmin(axis=1), weights=hist[occupied], minlength=n)
+
+    return build_color_info(centers.astype(int), counts)
+
+def extract_colors_mediancut(img_array, n_colors=5, resize_factor=0.25):
+    """Extract dominant colors dengan quantizer median cut bawaan Pillow"""
+    resized = Image.fromarray(resize_for_analysis(img_array, resize_factor))
+    pal_img = resized.quantize(colors=n_colors, method=Image.Quantize.MEDIANCUT)
+
+    palette = np.array(pal_img.getpalette()).reshape(-1, 3)
+    counts = np.bincount(np.asarray(pal_img).ravel(), minlength=len(palette))
+    used = np.flatnonzero(counts)
+
+    return build_color_info(palette[used], counts[used])
+
+EXTRACTION_METHODS = {
+    "KMeans": extract_colors_kmeans,
+    "Histogram": extract_colors_histogram,
+    "Median Cut": extract_colors_mediancut,
+}
+
+@st.cache_data(show_spinner=False)
+def extract_colors_cached(image_bytes, n_colors, resize_factor, method):
+    """Extract dominant colors dari file gambar, di-cache berdasarkan isi file dan parameter"""
+    img_array = np.asarray(Image.open(io.BytesIO(image_bytes)).convert('RGB'))
+    return EXTRACTION_METHODS[method](img_array, n_colors, resize_factor)
+
+COLOR_NAMES = [
+    "Putih/Terang", "Hitam/Gelap", "Merah/Oranye", "Merah", "Hijau",
+    "Biru/Ungu", "Biru", "Kuning", "Abu-abu",
+]
+
+@st.cache_resource
+def build_color_name_lut():
+    """Precompute index nama warna untuk setiap nilai RGB 8 bit (256x256x256, 16 MiB)"""
+    lut = np.empty((256, 256, 256), dtype=np.uint8)
+    g, b = np.meshgrid(np.arange(256), np.arange(256), indexing='ij')
+    for r in range(256):
+        conditions = [
+            (r > 200) & (g > 200) & (b > 200),
+            (r < 50) & (g < 50) & (b < 50),
+            (r > g) & (r > b) & (g > 100),
+            (r > g) & (r > b),
+            (g > r) & (g > b),
+            (b > r) & (b > g) & (r > 100),
+            (b > r) & (b > g),
+            (r > 150) & (g > 150),
+        ]
+        lut[r] = np.select(conditions, np.arange(len(conditions)), default=len(conditions))
+    return lut
+
+COLOR_NAME_LUT = build_color_name_lut()
 
 def get_color_name(rgb):
     """Menentukan nama warna berdasarkan RGB"""
-    r, g, b = rgb
-    if r > 200 and g > 200 and b > 200:
-        return "Putih/Terang"
-    elif r < 50 and g < 50 and b < 50:
-        return "Hitam/Gelap"
-    elif r > g and r > b:
-        return "Merah/Oranye" if g > 100 else "Merah"
-    elif g > r and g > b:
-        return "Hijau"
-    elif b > r and b > g:
-        return "Biru/Ungu" if r > 100 else "Biru"
-    elif r > 150 and g > 150:
-        return "Kuning"
-    else:
-        return "Abu-abu"
+    r, g, b = (int(v) for v in rgb)
+    return COLOR_NAMES[COLOR_NAME_LUT[r, g, b]]
 
 # --- Header ---
 st.title("🎨 Dominant Color Extractor")
 
 # --- Settings dalam expander ---
 with st.expander("⚙️ Pengaturan"):
-    col1, col2 = st.columns(2)
+    col1, col2, col3 = st.columns(3)
     with col1:
         n_colors = st.slider("Jumlah Warna", 3, 10, 5)
     with col2:
         resize_factor = st.slider("Kualitas Analisis", 0.1, 1.0, 0.3, step=0.1)
+    with col3:
+        method = st.selectbox(
+            "Metode",
+            list(EXTRACTION_METHODS),
+            help="Histogram dan Median Cut lebih cepat, KMeans lebih presisi"
+        )
 
 st.markdown("---")
 
@@ -125,16 +196,6 @@ if uploaded_file is not None:
     if image.mode == 'RGBA':
         image = image.convert('RGB')
     
-    # Generate hash untuk cache busting
-    image_hash = get_image_hash(image)
-    
-    # Simpan hash di session state untuk deteksi perubahan
-    if 'last_image_hash' not in st.session_state or st.session_state.last_image_hash != image_hash:
-        st.session_state.last_image_hash = image_hash
-        # Clear cache ketika gambar berubah
-        if 'cached_colors' in st.session_state:
-            del st.session_state.cached_colors
-    
     # Layout utama
     col1, col2 = st.columns([1, 1])
     
@@ -145,53 +206,43 @@ if uploaded_file is not None:
     with col2:
         st.subheader("Analisis Warna")
         
-        # Cache hasil analisis berdasarkan parameter
-        cache_key = f"{image_hash}_{n_colors}_{resize_factor}"
-        
-        if cache_key not in st.session_state:
-            with st.spinner("Menganalisis warna dominan..."):
-                try:
-                    colors = extract_colors_kmeans(image, n_colors, resize_factor)
-                    st.session_state[cache_key] = colors
-                except Exception as e:
-                    st.error(f"❌ Error dalam analisis: {str(e)}")
-                    st.stop()
-        else:
-            colors = st.session_state[cache_key]
+        with st.spinner("Menganalisis warna dominan..."):
+            try:
+                colors = extract_colors_cached(uploaded_file.getvalue(), n_colors, resize_factor, method)
+            except Exception as e:
+                st.error(f"❌ Error dalam analisis: {str(e)}")
+                st.stop()
                 
         # Grid layout untuk warna
         n_cols = min(3, len(colors))
-        for i in range(0, len(colors), n_cols):
-            cols = st.columns(n_cols)
-            for j, col in enumerate(cols):
-                if i + j < len(colors):
-                    c = colors[i + j]
-                    with col:
-                        st.markdown(f"""
-                            <div class="color-box" style="background-color: {c['hex']};"></div>
-                            <div class="color-info">
-                                <strong>{c['hex']}</strong><br>
-                                <small>{c['percentage']:.1f}%</small><br>
-                                <small>{get_color_name(c['color'])}</small>
-                            </div>
-                        """, unsafe_allow_html=True)
+        swatches = "".join(
+            f'<div>'
+            f'<div class="color-box" style="background-color: {c["hex"]};"></div>'
+            f'<div class="color-info">'
+            f'<strong>{c["hex"]}</strong><br>'
+            f'<small>{c["percentage"]:.1f}%</small><br>'
+            f'<small>{get_color_name(c["color"])}</small>'
+            f'</div>'
+            f'</div>'
+            for c in colors
+        )
+        st.markdown(
+            f'<div class="color-grid" style="grid-template-columns: repeat({n_cols}, 1fr);">{swatches}</div>',
+            unsafe_allow_html=True
+        )
     
     # Tabel detail warna
     st.markdown("---")
     st.subheader("Detail Warna")
     
     # Buat dataframe
-    df_data = []
-    for i, c in enumerate(colors):
-        df_data.append({
-            'Rank': i + 1,
-            'Hex Code': c['hex'],
-            'RGB': c['rgb'],
-            'Persentase': f"{c['percentage']:.1f}%",
-            'Nama Warna': get_color_name(c['color'])
-        })
-    
-    df = pd.DataFrame(df_data)
+    df = pd.DataFrame({
+        'Rank': np.arange(1, len(colors) + 1),
+        'Hex Code': [c['hex'] for c in colors],
+        'RGB': [c['rgb'] for c in colors],
+        'Persentase': [f"{c['percentage']:.1f}%" for c in colors],
+        'Nama Warna': [get_color_name(c['color']) for c in colors]
+    })
     
     # Tampilkan tabel dengan styling
     st.dataframe(